@@ -1,3 +1,4 @@
 from .bloom_filter import BloomFilter
+from .blocked_bloom_filter import BlockedBloomFilter
 
-__all__ = ["BloomFilter"]
+__all__ = ["BloomFilter", "BlockedBloomFilter"]
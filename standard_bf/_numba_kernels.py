@@ -0,0 +1,316 @@
+"""Numba-compiled batch kernels for the Bloom filter hot paths.
+
+Importing this module requires ``numba``; callers treat an ``ImportError``
+as "no JIT available" and fall back to the pure-Python/numpy paths.
+"""
+from __future__ import annotations
+
+import numpy as np
+from llvmlite import ir
+from numba import njit, prange, types
+from numba.core import cgutils
+from numba.extending import intrinsic
+
+# Items to look ahead when prefetching a block in the batch loops.
+PREFETCH_DISTANCE = 8
+
+
+@intrinsic
+def _prefetch(typingctx, arr, index):
+    """Emit ``llvm.prefetch`` (read, high locality) for ``&arr[index]``."""
+    sig = types.void(arr, index)
+
+    def codegen(context, builder, signature, args):
+        arr_ty, _ = signature.args
+        ary = context.make_array(arr_ty)(context, builder, args[0])
+        ptr = cgutils.get_item_pointer(context, builder, arr_ty, ary, [args[1]], wraparound=False)
+        i8p = ir.IntType(8).as_pointer()
+        i32 = ir.IntType(32)
+        fnty = ir.FunctionType(ir.VoidType(), [i8p, i32, i32, i32])
+        fn = cgutils.get_or_insert_function(builder.module, fnty, "llvm.prefetch.p0i8")
+        builder.call(fn, [builder.bitcast(ptr, i8p), i32(0), i32(3), i32(1)])
+        return context.get_dummy_value()
+
+    return sig, codegen
+
+
+@njit(cache=True)
+def add_batch(bits, h1, h2, size_mask, num_hashes):
+    """Set the Kirsch-Mitzenmacher bits for every (h1, h2) digest pair.
+
+    Args:
+        bits: Writable ``uint8`` view of the filter's bitset.
+        h1: ``uint64`` array of MurmurHash3 digests.
+        h2: ``uint64`` array of raw xxHash64 digests.
+        size_mask: Filter size minus one (the size is a power of two).
+        num_hashes: Number of hash functions to use.
+    """
+    mask = np.uint64(size_mask)
+    one = np.uint8(1)
+    for n in range(h1.shape[0]):
+        # Walk h1 + i*h2 as a running sum so each probe is an add and a mask
+        # held in registers, rather than a multiply per position.
+        step = (h2[n] & mask) | np.uint64(1)
+        idx = h1[n] & mask
+        for _ in range(num_hashes):
+            bits[idx >> np.uint64(3)] |= one << np.uint8(idx & np.uint64(7))
+            idx = (idx + step) & mask
+
+
+@njit(cache=True)
+def add_blocked_batch(bits, h1, h2, block_mask, num_hashes):
+    """Set k bits per digest pair inside a single 512-bit block.
+
+    Args:
+        bits: Writable, 64-byte aligned ``uint8`` view of the filter's bitset.
+        h1: ``uint64`` array of MurmurHash3 digests (selects the block).
+        h2: ``uint64`` array of raw xxHash64 digests (positions in the block).
+        block_mask: Number of blocks minus one (a power of two).
+        num_hashes: Number of hash functions to use.
+    """
+    mask = np.uint64(block_mask)
+    lane_mask = np.uint64(511)
+    one = np.uint8(1)
+    count = h1.shape[0]
+    for n in range(count):
+        # The block is known from h1 alone, so pull a later item's cache
+        # line in while this item's probes run.
+        ahead = n + PREFETCH_DISTANCE
+        if ahead < count:
+            _prefetch(bits, (h1[ahead] & mask) << np.uint64(6))
+        base = (h1[n] & mask) << np.uint64(6)
+        d = h2[n]
+        pos = d & lane_mask
+        step = ((d >> np.uint64(9)) & lane_mask) | np.uint64(1)
+        for _ in range(num_hashes):
+            bits[base + (pos >> np.uint64(3))] |= one << np.uint8(pos & np.uint64(7))
+            pos = (pos + step) & lane_mask
+
+
+# --- In-kernel hashing -------------------------------------------------------
+#
+# Ports of MurmurHash3_x86_32 (what ``mmh3.hash(..., signed=False)``
+# computes) and XXH64 (``xxhash.xxh64_intdigest``) over a slice of a packed
+# byte buffer, so batch kernels can hash without returning to Python. Both
+# must stay bit-for-bit identical to the C libraries used by the scalar path.
+
+_M32 = np.uint64(0xFFFFFFFF)
+_MM_C1 = np.uint64(0xCC9E2D51)
+_MM_C2 = np.uint64(0x1B873593)
+
+_XX_P1 = np.uint64(0x9E3779B185EBCA87)
+_XX_P2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_XX_P3 = np.uint64(0x165667B19E3779F9)
+_XX_P4 = np.uint64(0x85EBCA77C2B2AE63)
+_XX_P5 = np.uint64(0x27D4EB2F165667C5)
+
+
+@njit(inline="always")
+def _rotl32(x, r):
+    return ((x << np.uint64(r)) | (x >> np.uint64(32 - r))) & _M32
+
+
+@njit(inline="always")
+def _rotl64(x, r):
+    return (x << np.uint64(r)) | (x >> np.uint64(64 - r))
+
+
+@njit(inline="always")
+def _read32(data, p):
+    return (
+        np.uint64(data[p])
+        | (np.uint64(data[p + 1]) << np.uint64(8))
+        | (np.uint64(data[p + 2]) << np.uint64(16))
+        | (np.uint64(data[p + 3]) << np.uint64(24))
+    )
+
+
+@njit(inline="always")
+def _read64(data, p):
+    return _read32(data, p) | (_read32(data, p + 4) << np.uint64(32))
+
+
+@njit(cache=True)
+def murmur3_32(data, start, end, seed):
+    """MurmurHash3_x86_32 of ``data[start:end]``, as an unsigned value."""
+    h = np.uint64(seed) & _M32
+    length = end - start
+    p = start
+    for _ in range(length // 4):
+        k = (_read32(data, p) * _MM_C1) & _M32
+        k = (_rotl32(k, 15) * _MM_C2) & _M32
+        h = _rotl32(h ^ k, 13)
+        h = (h * np.uint64(5) + np.uint64(0xE6546B64)) & _M32
+        p += 4
+
+    rem = length & 3
+    if rem:
+        k = np.uint64(0)
+        if rem == 3:
+            k ^= np.uint64(data[p + 2]) << np.uint64(16)
+        if rem >= 2:
+            k ^= np.uint64(data[p + 1]) << np.uint64(8)
+        k ^= np.uint64(data[p])
+        k = (k * _MM_C1) & _M32
+        k = (_rotl32(k, 15) * _MM_C2) & _M32
+        h ^= k
+
+    h ^= np.uint64(length)
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x85EBCA6B)) & _M32
+    h ^= h >> np.uint64(13)
+    h = (h * np.uint64(0xC2B2AE35)) & _M32
+    h ^= h >> np.uint64(16)
+    return h
+
+
+@njit(inline="always")
+def _xx_round(acc, lane):
+    acc += lane * _XX_P2
+    return _rotl64(acc, 31) * _XX_P1
+
+
+@njit(inline="always")
+def _xx_merge(acc, val):
+    acc ^= _xx_round(np.uint64(0), val)
+    return acc * _XX_P1 + _XX_P4
+
+
+@njit(cache=True)
+def xxh64(data, start, end, seed):
+    """XXH64 of ``data[start:end]``."""
+    seed = np.uint64(seed)
+    length = end - start
+    p = start
+    if length >= 32:
+        v1 = seed + _XX_P1 + _XX_P2
+        v2 = seed + _XX_P2
+        v3 = seed
+        v4 = seed - _XX_P1
+        limit = end - 32
+        while p <= limit:
+            v1 = _xx_round(v1, _read64(data, p))
+            v2 = _xx_round(v2, _read64(data, p + 8))
+            v3 = _xx_round(v3, _read64(data, p + 16))
+            v4 = _xx_round(v4, _read64(data, p + 24))
+            p += 32
+        h = _rotl64(v1, 1) + _rotl64(v2, 7) + _rotl64(v3, 12) + _rotl64(v4, 18)
+        h = _xx_merge(h, v1)
+        h = _xx_merge(h, v2)
+        h = _xx_merge(h, v3)
+        h = _xx_merge(h, v4)
+    else:
+        h = seed + _XX_P5
+
+    h += np.uint64(length)
+    while p + 8 <= end:
+        h ^= _xx_round(np.uint64(0), _read64(data, p))
+        h = _rotl64(h, 27) * _XX_P1 + _XX_P4
+        p += 8
+    if p + 4 <= end:
+        h ^= _read32(data, p) * _XX_P1
+        h = _rotl64(h, 23) * _XX_P2 + _XX_P3
+        p += 4
+    while p < end:
+        h ^= np.uint64(data[p]) * _XX_P5
+        h = _rotl64(h, 11) * _XX_P1
+        p += 1
+
+    h ^= h >> np.uint64(33)
+    h *= _XX_P2
+    h ^= h >> np.uint64(29)
+    h *= _XX_P3
+    h ^= h >> np.uint64(32)
+    return h
+
+
+# --- Batch membership ------------------------------------------------------
+
+
+@njit(parallel=True, cache=True)
+def contains_batch(bits, data, offsets, seed1, seed2, size_mask, num_hashes):
+    """Hash and test every packed key in parallel.
+
+    Args:
+        bits: ``uint8`` view of the filter's bitset.
+        data: ``uint8`` buffer holding all keys back to back.
+        offsets: ``int64`` array; key ``i`` is ``data[offsets[i]:offsets[i + 1]]``.
+        seed1: MurmurHash3 seed.
+        seed2: xxHash64 seed (``uint64``).
+        size_mask: Filter size minus one (the size is a power of two).
+        num_hashes: Number of hash functions to use.
+
+    Returns:
+        A boolean array, ``True`` where the key may be in the filter.
+    """
+    count = offsets.shape[0] - 1
+    out = np.empty(count, dtype=np.bool_)
+    mask = np.uint64(size_mask)
+    for n in prange(count):
+        start = offsets[n]
+        end = offsets[n + 1]
+        idx = murmur3_32(data, start, end, seed1) & mask
+        # As in the scalar path, the first probe needs only h1: skip the
+        # xxHash64 pass for keys rejected there.
+        if (bits[idx >> np.uint64(3)] >> np.uint8(idx & np.uint64(7))) & np.uint8(1) == 0:
+            out[n] = False
+            continue
+        step = (xxh64(data, start, end, seed2) & mask) | np.uint64(1)
+        hit = True
+        for _ in range(num_hashes - 1):
+            idx = (idx + step) & mask
+            if (bits[idx >> np.uint64(3)] >> np.uint8(idx & np.uint64(7))) & np.uint8(1) == 0:
+                hit = False
+                break
+        out[n] = hit
+    return out
+
+
+@njit(parallel=True, cache=True)
+def contains_blocked_batch(bits, data, offsets, seed1, seed2, block_mask, num_hashes):
+    """Blocked-layout counterpart of :func:`contains_batch`."""
+    count = offsets.shape[0] - 1
+    out = np.empty(count, dtype=np.bool_)
+    mask = np.uint64(block_mask)
+    lane_mask = np.uint64(511)
+    for n in prange(count):
+        start = offsets[n]
+        end = offsets[n + 1]
+        base = (murmur3_32(data, start, end, seed1) & mask) << np.uint64(6)
+        d = xxh64(data, start, end, seed2)
+        pos = d & lane_mask
+        step = ((d >> np.uint64(9)) & lane_mask) | np.uint64(1)
+        hit = True
+        for _ in range(num_hashes):
+            byte = bits[base + (pos >> np.uint64(3))]
+            if (byte >> np.uint8(pos & np.uint64(7))) & np.uint8(1) == 0:
+                hit = False
+                break
+            pos = (pos + step) & lane_mask
+        out[n] = hit
+    return out
+
+
+@njit(parallel=True, cache=True)
+def hash_batch(data, offsets, seed1, seed2):
+    """Hash every packed key in parallel.
+
+    Args:
+        data: ``uint8`` buffer holding all keys back to back.
+        offsets: ``int64`` array; key ``i`` is ``data[offsets[i]:offsets[i + 1]]``.
+        seed1: MurmurHash3 seed.
+        seed2: xxHash64 seed (``uint64``).
+
+    Returns:
+        ``(h1, h2)``: ``uint64`` arrays of MurmurHash3 and raw xxHash64
+        digests, as :meth:`BloomFilter._hash_batch` computes them.
+    """
+    count = offsets.shape[0] - 1
+    h1 = np.empty(count, dtype=np.uint64)
+    h2 = np.empty(count, dtype=np.uint64)
+    for n in prange(count):
+        start = offsets[n]
+        end = offsets[n + 1]
+        h1[n] = murmur3_32(data, start, end, seed1)
+        h2[n] = xxh64(data, start, end, seed2)
+    return h1, h2
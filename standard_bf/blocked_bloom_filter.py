@@ -0,0 +1,157 @@
+"""Cache-line-blocked Bloom filter.
+
+Same hash families as :class:`BloomFilter`, but every item's k bits live in
+one 512-bit (64-byte) block: MurmurHash3 picks the block and xxHash64 drives
+Kirsch-Mitzenmacher double hashing inside it. An insert or lookup therefore
+touches exactly one cache line, at the cost of a slightly higher false
+positive rate than the unblocked filter of the same size.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import mmh3
+import numpy as np
+import xxhash
+
+from .bloom_filter import BloomFilter, _pack_keys
+
+try:
+    from ._numba_kernels import add_blocked_batch as _add_blocked_batch
+    from ._numba_kernels import contains_blocked_batch as _contains_blocked_batch
+except ImportError:  # numba is optional; fall back to the numpy paths
+    _add_blocked_batch = None
+    _contains_blocked_batch = None
+
+CACHE_LINE_BYTES = 64
+BLOCK_BITS = CACHE_LINE_BYTES * 8
+_LANE_MASK = BLOCK_BITS - 1
+
+
+def _aligned_zeros(nbytes: int, alignment: int) -> np.ndarray:
+    """Return a zeroed ``uint8`` array whose data starts on ``alignment``."""
+    raw = np.zeros(nbytes + alignment, dtype=np.uint8)
+    offset = -raw.ctypes.data % alignment
+    return raw[offset:offset + nbytes]
+
+
+class BlockedBloomFilter(BloomFilter):
+    """Bloom filter whose k bits per item share one 64-byte cache line."""
+
+    __slots__ = ("_block_count", "_block_mask")
+
+    def __init__(self, size: int, num_hashes: int, *, seed1: int = 0, seed2: int = 0) -> None:
+        """Initialize a blocked Bloom filter.
+
+        Args:
+            size: Requested number of bits; rounded up to a power of two and
+                to at least one 512-bit block.
+            num_hashes: Number of hash functions to use.
+            seed1: Seed for MurmurHash3, in ``[0, 2**32)`` (default 0).
+            seed2: Seed for xxHash64, in ``[0, 2**64)`` (default 0).
+
+        Raises:
+            ValueError: If size or num_hashes is not positive, or a seed is
+                out of range.
+        """
+        if size <= 0:
+            raise ValueError("size must be positive")
+        super().__init__(max(size, BLOCK_BITS), num_hashes, seed1=seed1, seed2=seed2)
+
+    def _configure(self, size: int, num_hashes: int, seed1: int, seed2: int) -> None:
+        """Set the parameters plus the block count and mask."""
+        super()._configure(size, num_hashes, seed1, seed2)
+        self._block_count = size // BLOCK_BITS
+        self._block_mask = self._block_count - 1
+
+    def _allocate(self, nbytes: int) -> None:
+        """Create zeroed storage starting on a 64-byte boundary.
+
+        Each block is then exactly one cache line; the memoryview keeps
+        scalar indexing cheap.
+        """
+        self._bits = _aligned_zeros(nbytes, CACHE_LINE_BYTES)
+        self._bit_array = memoryview(self._bits)
+
+    def add(self, item: str | bytes) -> None:
+        """Insert ``item`` into the filter."""
+        data = item.encode("utf-8") if isinstance(item, str) else item
+        base = (mmh3.hash(data, self.seed1, signed=False) & self._block_mask) * BLOCK_BITS
+        h2 = xxhash.xxh64_intdigest(data, self.seed2)
+        pos = h2 & _LANE_MASK
+        step = ((h2 >> 9) & _LANE_MASK) | 1
+        bit_array = self._bit_array
+
+        for _ in self._probes:
+            bit_index = base + pos
+            bit_array[bit_index >> 3] |= 1 << (bit_index & 7)
+            pos = (pos + step) & _LANE_MASK
+
+    def update(self, items: Iterable[str | bytes]) -> None:
+        """Insert all ``items`` into the filter."""
+        h1, h2 = self._hash_batch(items)
+        if _add_blocked_batch is not None:
+            _add_blocked_batch(self._bits, h1, h2, self._block_mask, self.num_hashes)
+            return
+
+        idx = self._bit_indices(h1, h2)
+        masks = np.left_shift(1, idx & 7).astype(np.uint8)
+        np.bitwise_or.at(self._bits, idx >> 3, masks)
+
+    def __contains__(self, item: str | bytes) -> bool:
+        """Check if ``item`` is in the filter."""
+        data = item.encode("utf-8") if isinstance(item, str) else item
+        base = (mmh3.hash(data, self.seed1, signed=False) & self._block_mask) * BLOCK_BITS
+        h2 = xxhash.xxh64_intdigest(data, self.seed2)
+        pos = h2 & _LANE_MASK
+        step = ((h2 >> 9) & _LANE_MASK) | 1
+        bit_array = self._bit_array
+
+        for _ in self._probes:
+            bit_index = base + pos
+            if not (bit_array[bit_index >> 3] & (1 << (bit_index & 7))):
+                return False
+            pos = (pos + step) & _LANE_MASK
+        return True
+
+    def contains_many(self, items: Iterable[str | bytes]) -> np.ndarray:
+        """Check many items at once (see :meth:`BloomFilter.contains_many`)."""
+        if _contains_blocked_batch is None:
+            return self._contains_many_numpy(items)
+
+        data, offsets = _pack_keys(items)
+        return _contains_blocked_batch(
+            self._bits, data, offsets,
+            np.uint64(self.seed1), np.uint64(self.seed2),
+            self._block_mask, self.num_hashes,
+        )
+
+    def _contains_many_numpy(self, items: Iterable[str | bytes]) -> np.ndarray:
+        """Vectorized numpy fallback, compacting rows as probes miss."""
+        h1, h2 = self._hash_batch(items)
+        bits = self._bits
+        alive = np.arange(len(h1))
+        base = (h1 & self._block_mask) * BLOCK_BITS
+        pos = h2 & _LANE_MASK
+        step = ((h2 >> 9) & _LANE_MASK) | 1
+        for _ in self._probes:
+            idx = base + pos
+            hit = (bits[idx >> 3] >> (idx & 7).astype(np.uint8)) & 1 != 0
+            alive, base, pos, step = alive[hit], base[hit], pos[hit], step[hit]
+            pos = (pos + step) & _LANE_MASK
+
+        out = np.zeros(len(h1), dtype=np.bool_)
+        out[alive] = True
+        return out
+
+    def _bit_indices(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        """Vectorized blocked positions, shape ``(len(h1), k)``."""
+        base = (h1 & self._block_mask) * BLOCK_BITS
+        pos = h2 & _LANE_MASK
+        step = ((h2 >> 9) & _LANE_MASK) | 1
+        return base[:, None] + ((pos[:, None] + self._ks * step[:, None]) & _LANE_MASK)
+
+    @property
+    def block_count(self) -> int:
+        """Number of 512-bit blocks in the filter."""
+        return self._block_count
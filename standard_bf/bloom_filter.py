@@ -5,73 +5,257 @@ combined with the Kirsch-Mitzenmacher optimization to derive k hash functions.
 """
 from __future__ import annotations
 
-from typing import Iterable, Iterator
+from itertools import repeat
+from typing import Iterable
 
 import mmh3
+import numpy as np
 import xxhash
 
+try:
+    from ._numba_kernels import add_batch as _add_batch
+    from ._numba_kernels import contains_batch as _contains_batch
+    from ._numba_kernels import hash_batch as _hash_batch_kernel
+except ImportError:  # numba is optional; fall back to the numpy paths
+    _add_batch = None
+    _contains_batch = None
+    _hash_batch_kernel = None
+
+
+def _pack_keys(items: Iterable[str | bytes]) -> tuple[np.ndarray, np.ndarray]:
+    """Pack keys into one contiguous byte buffer plus ``int64`` offsets.
+
+    Key ``i`` occupies ``data[offsets[i]:offsets[i + 1]]``; this flat layout
+    lets the Numba kernels hash every key without touching Python objects.
+    """
+    encoded = [item.encode("utf-8") if isinstance(item, str) else item for item in items]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return data, offsets
+
+
+def _popcount(bits: np.ndarray) -> int:
+    """Count set bits in a ``uint8`` buffer.
+
+    Counts over 64-bit words with ``np.bitwise_count`` (hardware POPCNT /
+    SIMD inside numpy >= 2.0) and falls back to ``np.unpackbits`` on older
+    numpy releases.
+    """
+    if bits.nbytes % 8 == 0:
+        bits = bits.view(np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum(dtype=np.uint64))
+    return int(np.unpackbits(bits.view(np.uint8)).sum(dtype=np.uint64))
+
 
 class BloomFilter:
-    """Simple Bloom filter backed by a bytearray bitset."""
+    """Simple Bloom filter backed by a bytearray bitset.
+
+    Items may be ``str`` or a ``str`` subclass such as ``numpy.str_`` (hashed
+    as UTF-8) or ``bytes`` (hashed as-is), so ``"abc"`` and ``b"abc"`` are the
+    same key.
+    """
+
+    __slots__ = ("size", "num_hashes", "seed1", "seed2", "_size_mask", "_bit_array", "_bits", "_ks", "_probes", "_later_probes")
 
     def __init__(self, size: int, num_hashes: int, *, seed1: int = 0, seed2: int = 0) -> None:
         """Initialize a Bloom filter.
         
         Args:
-            size: Number of bits in the filter.
+            size: Requested number of bits in the filter; rounded up to the
+                next power of two so positions can be reduced with a mask.
             num_hashes: Number of hash functions to use.
-            seed1: Seed for MurmurHash3 (default 0).
-            seed2: Seed for xxHash64 (default 0).
+            seed1: Seed for MurmurHash3, in ``[0, 2**32)`` (default 0).
+            seed2: Seed for xxHash64, in ``[0, 2**64)`` (default 0).
             
         Raises:
-            ValueError: If size or num_hashes is not positive.
+            ValueError: If size or num_hashes is not positive, or a seed is
+                out of range.
         """
         if size <= 0:
             raise ValueError("size must be positive")
         if num_hashes <= 0:
             raise ValueError("num_hashes must be positive")
+        if not 0 <= seed1 < 1 << 32:
+            raise ValueError("seed1 must be in [0, 2**32)")
+        if not 0 <= seed2 < 1 << 64:
+            raise ValueError("seed2 must be in [0, 2**64)")
+
+        self._configure(1 << (size - 1).bit_length(), num_hashes, seed1, seed2)
+        self._allocate((self.size + 7) // 8)
 
+    def _configure(self, size: int, num_hashes: int, seed1: int, seed2: int) -> None:
+        """Set the (already validated) parameters and derived constants."""
         self.size = size
+        self._size_mask = size - 1
         self.num_hashes = num_hashes
         self.seed1 = seed1
         self.seed2 = seed2
-        self._bit_array = bytearray((size + 7) // 8)
+        self._ks = np.arange(num_hashes, dtype=np.uint64)
+        # Reused by the scalar loops so each call skips building a range.
+        self._probes = range(num_hashes)
+        self._later_probes = range(num_hashes - 1)
 
-    def add(self, item: str) -> None:
+    def _allocate(self, nbytes: int) -> None:
+        """Create zeroed storage of ``nbytes`` bytes."""
+        self._bit_array = bytearray(nbytes)
+        # Zero-copy numpy view over the same memory for the batch kernels.
+        self._bits = np.frombuffer(self._bit_array, dtype=np.uint8)
+
+    def __getstate__(self) -> tuple[int, int, int, int, bytes]:
+        """Pickle only the parameters and the bits.
+
+        ``_bit_array`` and ``_bits`` share one buffer; pickling them as
+        separate attributes would give the copy two independent bitsets.
+        """
+        return self.size, self.num_hashes, self.seed1, self.seed2, bytes(self._bit_array)
+
+    def __setstate__(self, state: tuple[int, int, int, int, bytes]) -> None:
+        """Rebuild the storage and its views from :meth:`__getstate__`."""
+        size, num_hashes, seed1, seed2, bits = state
+        self._configure(size, num_hashes, seed1, seed2)
+        self._allocate(len(bits))
+        self._bits[:] = np.frombuffer(bits, dtype=np.uint8)
+
+    def add(self, item: str | bytes) -> None:
         """Insert ``item`` into the filter."""
-        for bit_index in self._hashes(item):
-            byte_index = bit_index >> 3
-            mask = 1 << (bit_index & 7)
-            self._bit_array[byte_index] |= mask
+        data = item.encode("utf-8") if isinstance(item, str) else item
+        size_mask = self._size_mask
+        h1 = mmh3.hash(data, self.seed1, signed=False)
+        # Force h2 odd: with a power-of-two size an odd step is coprime to the
+        # modulus, so the k positions never collapse (and h2 is never 0).
+        h2 = (xxhash.xxh64_intdigest(data, self.seed2) & size_mask) | 1
+        bit_array = self._bit_array
+
+        # Walk h1 + i*h2 as a running sum: one add and mask per probe
+        bit_index = h1 & size_mask
+        for _ in self._probes:
+            bit_array[bit_index >> 3] |= 1 << (bit_index & 7)
+            bit_index = (bit_index + h2) & size_mask
+
+    def update(self, items: Iterable[str | bytes]) -> None:
+        """Insert all ``items`` into the filter.
+
+        Items are hashed up front, then the bits are set by a single
+        JIT-compiled kernel call, or by one vectorized numpy scatter-OR when
+        numba is not installed.
+        """
+        h1, h2 = self._hash_batch(items)
+        if _add_batch is not None:
+            _add_batch(self._bits, h1, h2, self._size_mask, self.num_hashes)
+            return
 
-    def update(self, items: Iterable[str]) -> None:
-        """Insert all ``items`` into the filter."""
-        for item in items:
-            self.add(item)
+        idx = self._bit_indices(h1, h2)
+        masks = np.left_shift(1, idx & 7).astype(np.uint8)
+        np.bitwise_or.at(self._bits, idx >> 3, masks)
 
-    def __contains__(self, item: str) -> bool:
+    def __contains__(self, item: str | bytes) -> bool:
         """Check if ``item`` is in the filter."""
-        for bit_index in self._hashes(item):
-            byte_index = bit_index >> 3
-            mask = 1 << (bit_index & 7)
-            if not (self._bit_array[byte_index] & mask):
+        data = item.encode("utf-8") if isinstance(item, str) else item
+        size_mask = self._size_mask
+        bit_array = self._bit_array
+
+        # The first probe is h1 alone, so a clear bit rejects the item before
+        # the second hash is computed; most true negatives stop here.
+        bit_index = mmh3.hash(data, self.seed1, signed=False) & size_mask
+        if not (bit_array[bit_index >> 3] & (1 << (bit_index & 7))):
+            return False
+
+        h2 = (xxhash.xxh64_intdigest(data, self.seed2) & size_mask) | 1
+        for _ in self._later_probes:
+            bit_index = (bit_index + h2) & size_mask
+            if not (bit_array[bit_index >> 3] & (1 << (bit_index & 7))):
                 return False
         return True
 
-    def _hashes(self, item: str) -> Iterator[int]:
-        """Generate hash positions using Kirsch-Mitzenmacher double hashing."""
-        data = item.encode("utf-8")
-        h1 = mmh3.hash(data, self.seed1, signed=False)
-        h2 = xxhash.xxh64(data, seed=self.seed2).intdigest() % self.size
-        
-        # Ensure h2 != 0 to avoid infinite loop in arithmetic progression
-        if h2 == 0:
-            h2 = 1
+    def contains_many(self, items: Iterable[str | bytes]) -> np.ndarray:
+        """Check many items at once.
+
+        With numba the keys are packed into one byte buffer and hashed and
+        tested by a parallel JIT kernel; otherwise every item is hashed up
+        front and the bits are tested with vectorized numpy ops.
 
-        for i in range(self.num_hashes):
-            yield (h1 + i * h2) % self.size
+        Returns:
+            A boolean array with one entry per item, ``True`` where the item
+            may be in the filter.
+        """
+        if _contains_batch is None:
+            return self._contains_many_numpy(items)
+
+        data, offsets = _pack_keys(items)
+        return _contains_batch(
+            self._bits, data, offsets,
+            np.uint64(self.seed1), np.uint64(self.seed2),
+            self._size_mask, self.num_hashes,
+        )
+
+    def _contains_many_numpy(self, items: Iterable[str | bytes]) -> np.ndarray:
+        """Vectorized numpy fallback for :meth:`contains_many`.
+
+        Tests one probe column at a time and compacts away rows that already
+        missed, the batch analogue of the scalar early exit: negatives drop
+        out after a probe or two and no ``(n, k)`` index matrix is built.
+        """
+        h1, h2 = self._hash_batch(items)
+        size_mask = self._size_mask
+        bits = self._bits
+        alive = np.arange(len(h1))
+        pos = h1 & size_mask
+        step = (h2 & size_mask) | 1
+        for _ in self._probes:
+            hit = (bits[pos >> 3] >> (pos & 7).astype(np.uint8)) & 1 != 0
+            alive, pos, step = alive[hit], pos[hit], step[hit]
+            pos = (pos + step) & size_mask
+
+        out = np.zeros(len(h1), dtype=np.bool_)
+        out[alive] = True
+        return out
+
+    def _hash_batch(self, items: Iterable[str | bytes]) -> tuple[np.ndarray, np.ndarray]:
+        """Hash all ``items`` into two ``uint64`` digest arrays (h1, h2).
+
+        With numba, the keys are packed once and hashed by a parallel kernel.
+        Otherwise ``str`` items are UTF-8 encoded once (``bytes`` pass
+        through), then both hash families are driven by ``map`` over the
+        stateless digest functions so no per-item hasher objects or
+        generator frames are created. ``h2`` is returned unreduced; the batch
+        kernels mask it down to ``size``.
+        """
+        if _hash_batch_kernel is not None:
+            data, offsets = _pack_keys(items)
+            return _hash_batch_kernel(data, offsets, np.uint64(self.seed1), np.uint64(self.seed2))
+
+        encoded = [item.encode("utf-8") if isinstance(item, str) else item for item in items]
+        n = len(encoded)
+        h1 = np.fromiter(
+            map(mmh3.hash, encoded, repeat(self.seed1), repeat(False)),
+            dtype=np.uint64,
+            count=n,
+        )
+        h2 = np.fromiter(
+            map(xxhash.xxh64_intdigest, encoded, repeat(self.seed2)),
+            dtype=np.uint64,
+            count=n,
+        )
+        return h1, h2
+
+    def _bit_indices(self, h1: np.ndarray, h2: np.ndarray) -> np.ndarray:
+        """Vectorized Kirsch-Mitzenmacher positions, shape ``(len(h1), k)``."""
+        h2 = (h2 & self._size_mask) | 1
+        return (h1[:, None] + self._ks * h2[:, None]) & self._size_mask
+
+    def popcount(self) -> int:
+        """Return the number of bits currently set in the filter."""
+        return _popcount(self._bits)
 
     @property
-    def bit_array(self) -> bytearray:
-        """Expose the underlying bit array for inspection."""
-        return self._bit_array
+    def bit_array(self) -> np.ndarray:
+        """Expose the bitset as a C-contiguous ``uint8`` array.
+
+        This is a zero-copy view of the filter's storage, the same buffer
+        the batch kernels write to. The scalar paths keep using the
+        ``bytearray`` internally because single-byte indexing is much cheaper
+        there than on an ndarray.
+        """
+        return self._bits
@@ -1,72 +1,144 @@
 """Consolidated Bloom filter test suite.
 
 Performs a deterministic 80/20 split of unique tokens (sorted), builds the
-filter with the 80% training set, and runs four tests:
+filter with the 80% training set, and runs eight tests:
 
 1. Membership test on training set (should be all present)
 2. False positive rate on held-out test set (real words not inserted)
 3. Collision analysis using simple modifications of held-out words
 4. Filter properties and memory usage
-
-Filter size is set to 10x the number of training items, and we use 7 hash
-functions (Kirsch-Mitzenmacher double hashing).
+5. Cache-line-blocked variant compared at the same number of bits
+6. Query throughput (scalar `in` and batched `contains_many`)
+7. Pickle round trip of both filter variants
+8. Agreement between the batch (JIT) and scalar insert/query paths
+
+Filter size is set to 10x the number of training items (rounded up to a
+power of two by the filter), and we use 7 hash functions
+(Kirsch-Mitzenmacher double hashing).
 """
 from __future__ import annotations
 
 import csv
+import os
+import pickle
+import re
+import time
+from itertools import chain, compress, cycle, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Tuple, List, Optional
+from typing import Iterator, Tuple, List, Optional
 
 from .bloom_filter import BloomFilter
+from .blocked_bloom_filter import BlockedBloomFilter
 
 
 NUM_HASHES = 7
+PERF_QUERY_OPS = 200_000
 DATASET_DIR = Path(__file__).parent.parent / "dataset"
+TOKEN_CACHE = DATASET_DIR / "brown.tokens.pkl"
+CSV_READ_BUFFER = 1 << 20
+CSV_CHUNK_ROWS = 1024
+# Compiled equivalent of `any(c.isalnum() for c in s)`: `[^\W_]` matches
+# exactly the characters str.isalnum() accepts, but the scan runs in C
+_HAS_ALNUM = re.compile(r"[^\W_]").search
+# Bump when the cached payload or the normalization in _parse_tokens changes.
+TOKEN_CACHE_VERSION = 2
 
 
-def load_unique_tokens() -> list[str]:
-    """Load unique tokens from brown.csv and normalize them.
-    
-    Returns a sorted list of unique, normalized tokens.
+def load_tokens_and_count() -> Tuple[int, list[str]]:
+    """Read brown.csv once for both the raw token count and unique tokens.
+
+    The raw count covers every whitespace-separated token in the
+    `tokenized_text` column (including duplicates, no preprocessing). The
+    parsed result is cached next to the dataset in `brown.tokens.pkl`,
+    keyed on the CSV's mtime and size, so repeat runs skip parsing.
+
+    Returns (raw_token_count, sorted list of unique, normalized tokens).
     """
-    words = set()
     csv_file = DATASET_DIR / "brown.csv"
-    
+
     if not csv_file.exists():
         raise FileNotFoundError(f"Dataset file not found: {csv_file}")
-    
-    with open(csv_file, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            tokens = row.get("tokenized_text", "").split()
-            for token in tokens:
-                # Normalize: lowercase and filter alphanumeric
-                normalized = token.lower()
-                if normalized and any(c.isalnum() for c in normalized):
-                    words.add(normalized)
-    
-    return sorted(list(words))
 
+    stat = csv_file.stat()
+    key = (TOKEN_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(TOKEN_CACHE, "rb") as f:
+            cached_key, cached = pickle.load(f)
+        if cached_key == key:
+            return cached
+    except Exception:
+        # Any unreadable, truncated, stale or wrongly shaped cache is just a
+        # miss: fall through, re-parse and overwrite it
+        pass
+
+    result = _parse_tokens(csv_file)
 
-def count_raw_tokens() -> int:
-    """Count raw tokens in the CSV without any preprocessing.
+    # Write to a temp file and rename so a crash never leaves a torn cache
+    tmp = TOKEN_CACHE.with_suffix(".tmp")
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump((key, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, TOKEN_CACHE)
+    except OSError:
+        pass
 
-    This counts all whitespace-separated tokens found in the
-    `tokenized_text` column across all rows (including duplicates).
+    return result
+
+
+def load_unique_tokens() -> list[str]:
+    """Load unique tokens from brown.csv and normalize them.
+
+    Returns a sorted list of unique, normalized tokens.
     """
-    csv_file = DATASET_DIR / "brown.csv"
+    return load_tokens_and_count()[1]
 
-    if not csv_file.exists():
-        raise FileNotFoundError(f"Dataset file not found: {csv_file}")
 
-    total = 0
-    with open(csv_file, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            tokens = row.get("tokenized_text", "").split()
-            total += len(tokens)
+def _read_token_text(csv_file: Path, chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[list[str]]:
+    """Yield the `tokenized_text` column of `csv_file` in chunks of rows.
+
+    Rows come straight from the C `csv.reader` and the column is picked
+    with `itemgetter`, so no per-row dict is built in Python. The file is
+    read through a 1 MiB buffer to cut the number of read() syscalls, and
+    at most `chunk_rows` strings are held at a time.
 
-    return total
+    Blank lines are skipped, as `csv.DictReader` did. A non-blank row too
+    short to reach the column raises ValueError.
+    """
+    with open(csv_file, "r", encoding="utf-8", newline="", buffering=CSV_READ_BUFFER) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if "tokenized_text" not in header:
+            raise ValueError(f"Dataset file has no tokenized_text column: {csv_file}")
+        # csv.reader yields [] for a blank line; filter(None, ...) drops those
+        column = map(itemgetter(header.index("tokenized_text")), filter(None, reader))
+        while True:
+            try:
+                chunk = list(islice(column, chunk_rows))
+            except IndexError:
+                raise ValueError(
+                    f"Row on line {reader.line_num} has no tokenized_text field: {csv_file}"
+                ) from None
+            if not chunk:
+                return
+            yield chunk
+
+
+def _parse_tokens(csv_file: Path) -> Tuple[int, list[str]]:
+    """Parse `csv_file` in one pass into (raw count, unique tokens), uncached."""
+    raw_count = 0
+    words: set[str] = set()
+    # Normalize: lowercase and split each chunk in single C-level calls;
+    # lowercasing never changes the token count, so the same list gives the
+    # raw count before the set deduplicates it. Only one chunk's tokens are
+    # alive at a time, so peak memory tracks the vocabulary, not the corpus
+    for chunk in _read_token_text(csv_file):
+        tokens = " ".join(chunk).lower().split()
+        raw_count += len(tokens)
+        words.update(tokens)
+
+    # Filter alphanumeric once per unique token instead of once per occurrence
+    return raw_count, sorted(filter(_HAS_ALNUM, words))
 
 
 def build_split(words: Optional[list[str]] = None) -> Tuple[BloomFilter, list[str], list[str]]:
@@ -95,7 +167,8 @@ def build_split(words: Optional[list[str]] = None) -> Tuple[BloomFilter, list[st
 def test_membership(bloom: BloomFilter, train: list[str]) -> None:
     """Verify all training items are present in the filter."""
     print("TEST A: Membership on training set")
-    missing = [w for w in train if w not in bloom]
+    hits = bloom.contains_many(train)
+    missing = list(compress(train, (~hits).tolist()))
     print(f"  Training items: {len(train)}")
     print(f"  Missing after insertion: {len(missing)} (expected 0)")
     if missing:
@@ -103,46 +176,53 @@ def test_membership(bloom: BloomFilter, train: list[str]) -> None:
     print()
 
 
-def test_false_positive_on_heldout(bloom: BloomFilter, train: list[str], test: list[str]) -> None:
-    """Measure empirical false positive rate on held-out test set."""
+def test_false_positive_on_heldout(bloom: BloomFilter, held_out: list[str]) -> None:
+    """Measure empirical false positive rate on held-out test set.
+
+    `held_out` is the test split minus any word that was also inserted,
+    built once by the caller.
+    """
     print("TEST B: False positive rate on held-out real words")
-    test_filtered = [w for w in test if w not in train]
-    
-    if not test_filtered:
+    if not held_out:
         print("  No held-out words available for testing.")
         return
     
-    false_positives = sum(1 for w in test_filtered if w in bloom)
-    fpr = false_positives / len(test_filtered)
+    false_positives = int(bloom.contains_many(held_out).sum())
+    fpr = false_positives / len(held_out)
     
-    print(f"  Held-out words: {len(test_filtered)}")
+    print(f"  Held-out words: {len(held_out)}")
     print(f"  False positives: {false_positives}")
     print(f"  Empirical FPR: {fpr:.6f} ({fpr*100:.4f}%)")
     print()
 
 
-def test_collision_analysis(bloom: BloomFilter, train: list[str], test: list[str]) -> None:
-    """Analyze collision rate using simple word modifications."""
+def test_collision_analysis(
+    bloom: BloomFilter,
+    test: list[str],
+    train_set: frozenset[str],
+    test_set: frozenset[str],
+) -> None:
+    """Analyze collision rate using simple word modifications.
+
+    `train_set` and `test_set` are built once by the caller and used to drop
+    variants that happen to be real words.
+    """
     print("TEST C: Collision analysis with simple modifications of held-out words")
     sample = test[:500]
-    modifications = []
-    
-    for word in sample:
-        modifications.append(word + "x")
-        if len(word) > 1:
-            modifications.append(word[:-1] + "z")
-        modifications.append("x" + word)
+    variants = chain(
+        [word + "x" for word in sample],
+        [word[:-1] + "z" for word in sample if len(word) > 1],
+        ["x" + word for word in sample],
+    )
 
     # Remove any accidental actual words
-    train_set = set(train)
-    test_set = set(test)
-    modifications = [m for m in modifications if m not in train_set and m not in test_set]
+    modifications = [m for m in variants if m not in train_set and m not in test_set]
     
     if not modifications:
         print("  No modifications available for testing.")
         return
     
-    false_positives = sum(1 for m in modifications if m in bloom)
+    false_positives = int(bloom.contains_many(modifications).sum())
     rate = false_positives / len(modifications)
     
     print(f"  Variants tested: {len(modifications)}")
@@ -154,7 +234,7 @@ def test_collision_analysis(bloom: BloomFilter, train: list[str], test: list[str
 def show_properties(bloom: BloomFilter, train: list[str]) -> None:
     """Display filter memory and configuration properties."""
     print("TEST D: Filter properties")
-    bytes_len = len(bloom.bit_array)
+    bytes_len = bloom.bit_array.nbytes
     mb = bytes_len / (1024 * 1024)
     
     print(f"  Filter size (bits): {bloom.size}")
@@ -163,6 +243,102 @@ def show_properties(bloom: BloomFilter, train: list[str]) -> None:
     print(f"  Number of hash functions: {bloom.num_hashes}")
     print(f"  Words inserted: {len(train)}")
     print(f"  Bytes per word: {bytes_len / len(train):.4f}")
+    bits_set = bloom.popcount()
+    print(f"  Bits set: {bits_set} (fill ratio {bits_set / bloom.size:.4f})")
+    print()
+
+
+def test_blocked_variant(blocked: BlockedBloomFilter, train: list[str], held_out: list[str]) -> None:
+    """Compare the cache-line-blocked filter's FPR with the standard one's."""
+    print("TEST E: Cache-line-blocked variant (same number of bits)")
+    missing = len(train) - int(blocked.contains_many(train).sum())
+    false_positives = int(blocked.contains_many(held_out).sum())
+    fpr = false_positives / len(held_out) if held_out else 0.0
+
+    print(f"  Blocks (64 bytes each): {blocked.block_count}")
+    print(f"  Missing after insertion: {missing} (expected 0)")
+    print(f"  Held-out false positives: {false_positives}")
+    print(f"  Empirical FPR: {fpr:.6f} ({fpr*100:.4f}%)")
+    print()
+
+
+def test_performance(bloom: BloomFilter, test: list[str], target_ops: int = PERF_QUERY_OPS) -> None:
+    """Measure query throughput on the held-out words.
+
+    Queries cycle over `test` lazily instead of materializing a repeated
+    list, so the timed loop only touches the small held-out working set.
+    """
+    print("TEST F: Query throughput")
+    if not test:
+        print("  No held-out words available for testing.")
+        return
+
+    start = time.perf_counter()
+    for word in islice(cycle(test), target_ops):
+        word in bloom
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bloom.contains_many(test)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"  Scalar queries: {target_ops} in {scalar_elapsed:.3f}s ({target_ops / scalar_elapsed:,.0f} ops/s)")
+    print(f"  Batched queries: {len(test)} in {batch_elapsed:.3f}s ({len(test) / batch_elapsed:,.0f} ops/s)")
+    print()
+
+
+def test_round_trip(bloom: BloomFilter, blocked: BlockedBloomFilter, held_out: list[str]) -> None:
+    """Check that pickled copies keep their bits and stay self-consistent.
+
+    Words added to a copy with the batch `update()` must then be found by
+    the scalar `in` path, which reads the same storage.
+    """
+    print("TEST G: Pickle round trip")
+    sample = held_out[:1000]
+
+    for original in (bloom, blocked):
+        clone = pickle.loads(pickle.dumps(original))
+        same_bits = clone.bit_array.tobytes() == original.bit_array.tobytes()
+        clone.update(sample)
+        missing = sum(1 for w in sample if w not in clone)
+        print(f"  {type(original).__name__}:")
+        print(f"    Bitset preserved: {same_bits} (expected True)")
+        print(f"    Missing after update on the copy: {missing} (expected 0)")
+    print()
+
+
+def test_batch_agreement(
+    bloom: BloomFilter,
+    blocked: BlockedBloomFilter,
+    train: list[str],
+    held_out: list[str],
+) -> None:
+    """Check the batch paths against the scalar `add()` / `in` paths.
+
+    With numba installed the batch paths hash with in-kernel ports of
+    MurmurHash3 and xxHash64, so any drift from the mmh3/xxhash libraries
+    used by the scalar paths shows up here as a mismatch.
+    """
+    print("TEST H: Scalar/batch agreement")
+    sample = train[:2000]
+    queries = held_out + sample
+    # Non-zero seeds, with the top bit of seed2 set, exercise the seed handling
+    seeds = {"seed1": 0x9747B28C, "seed2": (1 << 63) | 0x5BD1E995}
+
+    for trained in (bloom, blocked):
+        cls = type(trained)
+        batch = cls(size=bloom.size, num_hashes=bloom.num_hashes, **seeds)
+        scalar = cls(size=bloom.size, num_hashes=bloom.num_hashes, **seeds)
+        batch.update(sample)
+        for word in sample:
+            scalar.add(word)
+        same_bits = batch.bit_array.tobytes() == scalar.bit_array.tobytes()
+
+        batch_hits = trained.contains_many(queries).tolist()
+        mismatches = sum(1 for word, hit in zip(queries, batch_hits) if (word in trained) != hit)
+        print(f"  {cls.__name__}:")
+        print(f"    update() bitset matches add(): {same_bits} (expected True)")
+        print(f"    contains_many vs `in` mismatches: {mismatches} of {len(queries)} (expected 0)")
     print()
 
 
@@ -173,20 +349,33 @@ def run_all() -> None:
     print("=" * 60)
     print()
     
-    # Raw token count (no preprocessing) and full unique token list size
-    raw_count = count_raw_tokens()
+    # Raw token count (no preprocessing) and full unique token list size,
+    # both from a single read of the CSV
+    raw_count, full_words = load_tokens_and_count()
     print(f"Raw CSV tokens (no preprocessing): {raw_count}")
-
-    # Load full unique token list and print its size before splitting
-    full_words = load_unique_tokens()
     print(f"Full dataset unique tokens: {len(full_words)}")
 
     bloom, train, test = build_split(full_words)
-    
+    # train/test hold their own references to every token; drop the
+    # full-list pointer array so it is not kept alive for the whole run
+    del full_words
+    # Cache-line-blocked filter of the same size holding the same words,
+    # built once for every test that compares or checks both variants
+    blocked = BlockedBloomFilter(size=bloom.size, num_hashes=bloom.num_hashes)
+    blocked.update(train)
+    # Shared by every test that needs to exclude real words
+    train_set = frozenset(train)
+    test_set = frozenset(test)
+    held_out = [w for w in test if w not in train_set]
+
     test_membership(bloom, train)
-    test_false_positive_on_heldout(bloom, train, test)
-    test_collision_analysis(bloom, train, test)
+    test_false_positive_on_heldout(bloom, held_out)
+    test_collision_analysis(bloom, test, train_set, test_set)
     show_properties(bloom, train)
+    test_blocked_variant(blocked, train, held_out)
+    test_performance(bloom, test)
+    test_round_trip(bloom, blocked, held_out)
+    test_batch_agreement(bloom, blocked, train, held_out)
     
     print("=" * 60)
     print("Test suite completed successfully!")